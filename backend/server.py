@@ -1,20 +1,36 @@
+import os
+
+# Tesseract spawns its own OpenMP threads per call; cap them so the page
+# workers below don't oversubscribe the CPU. Must be set before tesserocr loads.
+os.environ.setdefault("OMP_THREAD_LIMIT", "1")
+
 from fastapi import FastAPI, APIRouter, File, UploadFile, HTTPException, Form
+from fastapi.responses import ORJSONResponse
 from dotenv import load_dotenv
 from starlette.middleware.cors import CORSMiddleware
-from motor.motor_asyncio import AsyncIOMotorClient
-import os
+from motor.motor_asyncio import AsyncIOMotorClient, AsyncIOMotorGridFSBucket
+from pymongo.errors import BulkWriteError
+import asyncio
 import logging
 from pathlib import Path
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, ConfigDict, Field
 from typing import List, Optional, Dict, Any
 from datetime import datetime, date
-import base64
+import hashlib
+import json
+import multiprocessing
 import tempfile
+import threading
+import uuid
+from functools import lru_cache
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
 import cv2
 import numpy as np
-from pdf2image import convert_from_bytes
-import pytesseract
-import requests
+from PIL import Image
+import fitz  # PyMuPDF
+from tesserocr import PyTessBaseAPI, OEM
+import httpx
+from async_lru import alru_cache
 from huggingface_hub import InferenceClient
 
 ROOT_DIR = Path(__file__).parent
@@ -24,9 +40,14 @@ load_dotenv(ROOT_DIR / '.env')
 mongo_url = os.environ['MONGO_URL']
 client = AsyncIOMotorClient(mongo_url)
 db = client[os.environ['DB_NAME']]
+# Uploaded PDFs are kept as raw binary in GridFS rather than inline in report documents
+fs = AsyncIOMotorGridFSBucket(db)
+
+# Shared HTTP client for outbound API calls, keeps connections alive across requests
+http_client = httpx.AsyncClient(timeout=10, http2=True)
 
 # Create the main app without a prefix
-app = FastAPI()
+app = FastAPI(default_response_class=ORJSONResponse)
 
 # Create a router with the /api prefix
 api_router = APIRouter(prefix="/api")
@@ -38,10 +59,39 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+# Number of PDF pages rasterized and held in memory at once during OCR
+PDF_PAGE_CHUNK = 5
+# Rasterization resolution; typed lab reports OCR fine at this density
+PDF_RENDER_DPI = 150
+# Longest side of a rendered page in pixels; oversized pages are scaled down to fit
+PDF_MAX_PAGE_PX = 2200
+# Upper bound on logs accepted by one bulk request, keeping a single insert_many bounded
+MAX_BULK_DAILY_LOGS = 500
+# OCR and AI responses are cache entries, not records; Mongo expires them after this long
+CACHE_TTL_SECONDS = 30 * 24 * 3600
+# PDFs OCR'd concurrently, each in its own worker process
+PDF_OCR_PROCESSES = 2
+
+# Tesseract handles are not thread-safe, so each OCR worker thread keeps its own
+_tess_local = threading.local()
+# Long-lived OCR workers, so each thread loads its Tesseract engine once per
+# process instead of once per uploaded PDF
+_ocr_executor = ThreadPoolExecutor(
+    max_workers=max(1, (os.cpu_count() or 1) // PDF_OCR_PROCESSES), thread_name_prefix="ocr"
+)
+# PyMuPDF is not thread-safe, so whole PDFs are OCR'd in separate processes: MuPDF
+# only ever runs on one thread per process, and page rendering never holds the
+# event loop's GIL. Spawned (not forked) so workers don't inherit Motor's threads.
+_pdf_executor = ProcessPoolExecutor(
+    max_workers=PDF_OCR_PROCESSES, mp_context=multiprocessing.get_context("spawn")
+)
+
 # ============ Models ============
 
 class User(BaseModel):
-    user_id: str = Field(default_factory=lambda: str(datetime.now().timestamp()))
+    model_config = ConfigDict(extra='ignore')
+
+    user_id: str = Field(default_factory=lambda: uuid.uuid4().hex)
     name: str
     email: str
     age: int
@@ -51,6 +101,8 @@ class User(BaseModel):
     created_at: datetime = Field(default_factory=datetime.utcnow)
 
 class UserCreate(BaseModel):
+    model_config = ConfigDict(extra='ignore')
+
     name: str
     email: str
     age: int
@@ -59,15 +111,19 @@ class UserCreate(BaseModel):
     weight: Optional[float] = None
 
 class HealthReport(BaseModel):
-    report_id: str = Field(default_factory=lambda: str(datetime.now().timestamp()))
+    model_config = ConfigDict(extra='ignore')
+
+    report_id: str = Field(default_factory=lambda: uuid.uuid4().hex)
     user_id: str
-    pdf_base64: str
+    pdf_file_id: str  # GridFS id of the original PDF
     extracted_text: str
     ai_analysis: Optional[str] = None
     parameters_extracted: Optional[Dict[str, Any]] = None
     upload_date: datetime = Field(default_factory=datetime.utcnow)
 
 class HealthReportResponse(BaseModel):
+    model_config = ConfigDict(extra='ignore')
+
     report_id: str
     user_id: str
     extracted_text: str
@@ -76,7 +132,9 @@ class HealthReportResponse(BaseModel):
     upload_date: datetime
 
 class DailyLog(BaseModel):
-    log_id: str = Field(default_factory=lambda: str(datetime.now().timestamp()))
+    model_config = ConfigDict(extra='ignore')
+
+    log_id: str = Field(default_factory=lambda: uuid.uuid4().hex)
     user_id: str
     log_date: str  # Changed from date to str for MongoDB compatibility
     breakfast: Dict[str, Any]
@@ -87,6 +145,8 @@ class DailyLog(BaseModel):
     created_at: datetime = Field(default_factory=datetime.utcnow)
 
 class DailyLogCreate(BaseModel):
+    model_config = ConfigDict(extra='ignore')
+
     user_id: str
     log_date: str
     breakfast: Dict[str, Any]
@@ -96,7 +156,9 @@ class DailyLogCreate(BaseModel):
     water_intake: str
 
 class WorkoutPlan(BaseModel):
-    plan_id: str = Field(default_factory=lambda: str(datetime.now().timestamp()))
+    model_config = ConfigDict(extra='ignore')
+
+    plan_id: str = Field(default_factory=lambda: uuid.uuid4().hex)
     user_id: str
     plan_date: str  # Changed from date to str for MongoDB compatibility
     exercises: List[Dict[str, Any]]
@@ -104,48 +166,125 @@ class WorkoutPlan(BaseModel):
     created_at: datetime = Field(default_factory=datetime.utcnow)
 
 class WorkoutPlanCreate(BaseModel):
+    model_config = ConfigDict(extra='ignore')
+
     user_id: str
 
 class AnalysisRequest(BaseModel):
+    model_config = ConfigDict(extra='ignore')
+
     report_id: str
     hf_api_key: str
 
 # ============ Helper Functions ============
 
-def extract_text_from_pdf_base64(pdf_base64: str) -> str:
-    """Extract text from PDF using OCR"""
+def _get_tess_api() -> PyTessBaseAPI:
+    """Return this thread's Tesseract engine, loading it on first use"""
+    api = getattr(_tess_local, "api", None)
+    if api is None:
+        api = PyTessBaseAPI(lang="eng", oem=OEM.LSTM_ONLY)
+        _tess_local.api = api
+    return api
+
+def _ocr_one_page(thresh: np.ndarray) -> str:
+    """Run OCR on a single preprocessed page"""
+    api = _get_tess_api()
+    api.SetImage(Image.fromarray(thresh))
+    return api.GetUTF8Text()
+
+def _iter_page_chunks(pdf_bytes: bytes, chunk: int = PDF_PAGE_CHUNK):
+    """Rasterize a PDF `chunk` pages at a time, yielding each chunk as a list of grayscale arrays"""
+    with fitz.open(stream=pdf_bytes, filetype="pdf") as doc:
+        pages = []
+        for page in doc:
+            # Clamp the scale up front so oversized pages are never rendered at full size
+            zoom = min(PDF_RENDER_DPI / 72, PDF_MAX_PAGE_PX / max(page.rect.width, page.rect.height))
+            # Render straight to grayscale so no color conversion pass is needed
+            pix = page.get_pixmap(matrix=fitz.Matrix(zoom, zoom), colorspace=fitz.csGRAY)
+            pages.append(np.frombuffer(pix.samples, dtype=np.uint8).reshape(pix.h, pix.w))
+            if len(pages) == chunk:
+                yield pages
+                pages = []
+        if pages:
+            yield pages
+
+def _preprocess_page(gray: np.ndarray) -> np.ndarray:
+    """Binarize a grayscale page image for better OCR accuracy"""
+    # Remove speckle noise, then threshold locally so unevenly lit scans
+    # don't end up with the black blotches a global (Otsu) threshold leaves
+    # The rendered page buffer is read-only, so blur into one new buffer and
+    # threshold that in place instead of allocating a second page-sized array
+    blurred = cv2.medianBlur(gray, 3)
+    return cv2.adaptiveThreshold(
+        blurred, 255, cv2.ADAPTIVE_THRESH_GAUSSIAN_C, cv2.THRESH_BINARY, 31, 10, dst=blurred
+    )
+
+def extract_text_from_pdf_bytes(pdf_bytes: bytes) -> str:
+    """Extract text from PDF using OCR (runs inside a _pdf_executor worker process)"""
+    texts = []
+    # Pages are independent, so OCR each chunk in parallel (map keeps page order).
+    # Only one chunk of pages is held in memory at a time.
+    for pages in _iter_page_chunks(pdf_bytes):
+        thresh_list = [_preprocess_page(page) for page in pages]
+        texts.extend(_ocr_executor.map(_ocr_one_page, thresh_list))
+    
+    full_text = [f"--- Page {page_num + 1} ---\n{text}" for page_num, text in enumerate(texts)]
+    return "\n".join(full_text)
+
+async def extract_text_from_pdf_cached(pdf_bytes: bytes) -> str:
+    """Extract text from PDF, reusing earlier OCR output for identical files"""
+    digest = hashlib.sha256(pdf_bytes).hexdigest()
+    cached = await db.ocr_cache.find_one({"sha256": digest})
+    if cached:
+        return cached["text"]
+    
+    # OCR is CPU-bound, keep it off the event loop
     try:
-        # Decode base64 to bytes
-        pdf_bytes = base64.b64decode(pdf_base64)
-        
-        # Convert PDF to images
-        pages = convert_from_bytes(pdf_bytes)
-        
-        full_text = []
-        for page_num, page in enumerate(pages):
-            # Convert PIL to OpenCV format
-            img_array = np.array(page)
-            img_array = cv2.cvtColor(img_array, cv2.COLOR_RGB2BGR)
-            
-            # Preprocess: grayscale, threshold for better accuracy
-            gray = cv2.cvtColor(img_array, cv2.COLOR_BGR2GRAY)
-            thresh = cv2.threshold(gray, 0, 255, cv2.THRESH_BINARY + cv2.THRESH_OTSU)[1]
-            
-            # Extract text
-            text = pytesseract.image_to_string(thresh)
-            full_text.append(f"--- Page {page_num + 1} ---\n{text}")
-        
-        return "\n".join(full_text)
+        loop = asyncio.get_running_loop()
+        text = await loop.run_in_executor(_pdf_executor, extract_text_from_pdf_bytes, pdf_bytes)
     except Exception as e:
-        logger.error(f"OCR extraction failed: {str(e)}")
+        logger.error("OCR extraction failed: %s", e)
         raise HTTPException(status_code=500, detail=f"OCR failed: {str(e)}")
-
-def analyze_health_report_with_ai(extracted_text: str, hf_api_key: str) -> Dict[str, Any]:
+    
+    await db.ocr_cache.update_one(
+        {"sha256": digest},
+        {"$setOnInsert": {"text": text, "created_at": datetime.utcnow()}},
+        upsert=True
+    )
+    return text
+
+@lru_cache(maxsize=8)
+def _get_hf_client(hf_api_key: str) -> InferenceClient:
+    """Return a shared Hugging Face client per API key so connections are reused"""
+    return InferenceClient(token=hf_api_key, headers={"X-use-cache": "true"})
+
+async def _cached_chat_completion(hf_api_key: str, messages: List[Dict[str, str]], model: str, **params) -> str:
+    """Run a chat completion, reusing the stored response when the same key sent the same prompt before"""
+    # The key hash scopes entries per caller, so an invalid key never gets another key's cached answer
+    key_hash = hashlib.sha256(hf_api_key.encode()).hexdigest()
+    cache_key = hashlib.sha256(
+        json.dumps({"key_hash": key_hash, "model": model, "messages": messages, **params}, sort_keys=True).encode()
+    ).hexdigest()
+    
+    cached = await db.hf_cache.find_one({"key": cache_key})
+    if cached:
+        return cached["response"]
+    
+    client = _get_hf_client(hf_api_key)
+    response = await asyncio.to_thread(client.chat_completion, messages=messages, model=model, **params)
+    content = response.choices[0].message.content
+    
+    await db.hf_cache.update_one(
+        {"key": cache_key},
+        {"$set": {"response": content, "model": model, "created_at": datetime.utcnow()}},
+        upsert=True
+    )
+    return content
+
+async def analyze_health_report_with_ai(extracted_text: str, hf_api_key: str) -> Dict[str, Any]:
     """Analyze health report using Hugging Face free models"""
     try:
         # Use Hugging Face Inference API with chat completion endpoint
-        client = InferenceClient(token=hf_api_key)
-        
         messages = [
             {
                 "role": "user",
@@ -171,49 +310,54 @@ Please provide a detailed analysis in the following format:
         ]
         
         # Using Meta-Llama-3-8B-Instruct with chat_completion
-        response = client.chat_completion(
+        analysis_text = await _cached_chat_completion(
+            hf_api_key,
             messages=messages,
             model="meta-llama/Meta-Llama-3-8B-Instruct",
             max_tokens=1000,
             temperature=0.7
         )
         
-        analysis_text = response.choices[0].message.content
-        
         return {
             "analysis": analysis_text,
             "model_used": "meta-llama/Meta-Llama-3-8B-Instruct"
         }
     except Exception as e:
-        logger.error(f"AI analysis failed: {str(e)}")
+        logger.error("AI analysis failed: %s", e)
         raise HTTPException(status_code=500, detail=f"AI analysis failed: {str(e)}")
 
-def get_workout_exercises_from_wger(query: str = "fitness", limit: int = 10) -> List[Dict[str, Any]]:
+@alru_cache(maxsize=64, ttl=3600)
+async def _fetch_wger_exercises(limit: int) -> List[Dict[str, Any]]:
+    """Fetch exercises from WGER API, cached since the catalogue rarely changes"""
+    base_url = "https://wger.de/api/v2"
+    response = await http_client.get(f"{base_url}/exercise/?language=2&limit={limit}")
+    response.raise_for_status()
+    
+    data = response.json()
+    exercises = []
+    for ex in data.get('results', [])[:limit]:
+        exercises.append({
+            "id": ex.get('id'),
+            "name": ex.get('name'),
+            "description": ex.get('description', ''),
+            "category": ex.get('category', ''),
+            "equipment": ex.get('equipment', [])
+        })
+    return exercises
+
+async def get_workout_exercises_from_wger(query: str = "fitness", limit: int = 10) -> List[Dict[str, Any]]:
     """Fetch exercises from WGER API"""
     try:
-        base_url = "https://wger.de/api/v2"
-        response = requests.get(f"{base_url}/exercise/?language=2&limit={limit}")
-        
-        if response.status_code == 200:
-            data = response.json()
-            exercises = []
-            for ex in data.get('results', [])[:limit]:
-                exercises.append({
-                    "id": ex.get('id'),
-                    "name": ex.get('name'),
-                    "description": ex.get('description', ''),
-                    "category": ex.get('category', ''),
-                    "equipment": ex.get('equipment', [])
-                })
-            return exercises
-        else:
-            logger.warning(f"WGER API returned status {response.status_code}")
-            return []
+        # Failures raise out of the cached fetch, so they are never cached
+        return list(await _fetch_wger_exercises(limit))
+    except httpx.HTTPStatusError as e:
+        logger.warning("WGER API returned status %s", e.response.status_code)
+        return []
     except Exception as e:
-        logger.error(f"WGER API call failed: {str(e)}")
+        logger.error("WGER API call failed: %s", e)
         return []
 
-def generate_adaptive_workout_plan(user_id: str, daily_logs: List[Dict], hf_api_key: str) -> Dict[str, Any]:
+async def generate_adaptive_workout_plan(user_id: str, daily_logs: List[Dict], hf_api_key: str) -> Dict[str, Any]:
     """Generate adaptive workout plan based on daily logs using AI"""
     try:
         # Get recent logs summary
@@ -222,7 +366,7 @@ def generate_adaptive_workout_plan(user_id: str, daily_logs: List[Dict], hf_api_
             logs_summary.append(f"Date: {log.get('log_date')}, Water: {log.get('water_intake')}")
         
         # Get exercises from WGER
-        exercises = get_workout_exercises_from_wger(limit=15)
+        exercises = await get_workout_exercises_from_wger(limit=15)
         exercises_text = "\n".join([f"- {ex['name']}: {ex.get('description', 'No description')[:100]}" for ex in exercises])
         
         messages = [
@@ -260,27 +404,25 @@ Format your response as:
             }
         ]
         
-        client = InferenceClient(token=hf_api_key)
-        response = client.chat_completion(
+        recommendations_text = await _cached_chat_completion(
+            hf_api_key,
             messages=messages,
             model="meta-llama/Meta-Llama-3-8B-Instruct",
             max_tokens=800,
             temperature=0.8
         )
         
-        recommendations_text = response.choices[0].message.content
-        
         return {
             "recommendations": recommendations_text,
             "exercises": exercises[:7],  # Return some exercises for display
             "model_used": "meta-llama/Meta-Llama-3-8B-Instruct"
         }
     except Exception as e:
-        logger.error(f"Workout plan generation failed: {str(e)}")
+        logger.error("Workout plan generation failed: %s", e)
         # Return fallback plan
         return {
             "recommendations": "Please maintain regular physical activity. Aim for 30 minutes of moderate exercise daily.",
-            "exercises": get_workout_exercises_from_wger(limit=7),
+            "exercises": await get_workout_exercises_from_wger(limit=7),
             "model_used": "fallback"
         }
 
@@ -294,8 +436,8 @@ async def root():
 @api_router.post("/users", response_model=User)
 async def create_user(user_input: UserCreate):
     """Create a new user"""
-    user = User(**user_input.dict())
-    await db.users.insert_one(user.dict())
+    user = User(**user_input.model_dump())
+    await db.users.insert_one(user.model_dump())
     return user
 
 @api_router.get("/users/{user_id}", response_model=User)
@@ -323,21 +465,31 @@ async def upload_health_report(
         raise HTTPException(status_code=400, detail="Only PDF files are allowed")
     
     try:
-        # Read file and convert to base64
+        # Read file
         pdf_bytes = await file.read()
-        pdf_base64 = base64.b64encode(pdf_bytes).decode('utf-8')
         
         # Extract text using OCR
-        extracted_text = extract_text_from_pdf_base64(pdf_base64)
+        extracted_text = await extract_text_from_pdf_cached(pdf_bytes)
+        del pdf_bytes
+        
+        # Store the original PDF in GridFS, streamed 1 MB at a time from the
+        # upload's spooled temp file rather than from an in-memory copy
+        await file.seek(0)
+        pdf_file_id = await fs.upload_from_stream(
+            file.filename,
+            file.file,
+            chunk_size_bytes=1 << 20,
+            metadata={"user_id": user_id, "content_type": "application/pdf"}
+        )
         
         # Create report document
         report = HealthReport(
             user_id=user_id,
-            pdf_base64=pdf_base64,
+            pdf_file_id=str(pdf_file_id),
             extracted_text=extracted_text
         )
         
-        await db.health_reports.insert_one(report.dict())
+        await db.health_reports.insert_one(report.model_dump())
         
         return {
             "report_id": report.report_id,
@@ -346,7 +498,7 @@ async def upload_health_report(
             "message": "Report uploaded successfully. Use /analyze endpoint to get AI analysis."
         }
     except Exception as e:
-        logger.error(f"Upload failed: {str(e)}")
+        logger.error("Upload failed: %s", e)
         raise HTTPException(status_code=500, detail=f"Upload failed: {str(e)}")
 
 @api_router.post("/health-reports/analyze")
@@ -358,7 +510,7 @@ async def analyze_report(analysis_req: AnalysisRequest):
     
     try:
         # Get AI analysis
-        ai_result = analyze_health_report_with_ai(report['extracted_text'], analysis_req.hf_api_key)
+        ai_result = await analyze_health_report_with_ai(report['extracted_text'], analysis_req.hf_api_key)
         
         # Update report with analysis
         await db.health_reports.update_one(
@@ -380,25 +532,67 @@ async def analyze_report(analysis_req: AnalysisRequest):
 @api_router.get("/health-reports/{user_id}", response_model=List[HealthReportResponse])
 async def get_user_reports(user_id: str):
     """Get all reports for a user"""
-    reports = await db.health_reports.find({"user_id": user_id}).to_list(100)
-    return [HealthReportResponse(
-        report_id=r['report_id'],
-        user_id=r['user_id'],
-        extracted_text=r['extracted_text'][:500] + "..." if len(r['extracted_text']) > 500 else r['extracted_text'],
-        ai_analysis=r.get('ai_analysis'),
-        parameters_extracted=r.get('parameters_extracted'),
-        upload_date=r['upload_date']
-    ) for r in reports]
+    # Truncate the text preview inside Mongo so only ~500 characters per report
+    # leave the database (and any legacy inline PDF is never loaded at all)
+    pipeline = [
+        {"$match": {"user_id": user_id}},
+        {"$sort": {"upload_date": -1}},
+        {"$limit": 100},
+        {"$project": {
+            "_id": 0,
+            "report_id": 1,
+            "user_id": 1,
+            "ai_analysis": 1,
+            "parameters_extracted": 1,
+            "upload_date": 1,
+            "extracted_text": {"$cond": [
+                {"$gt": [{"$strLenCP": "$extracted_text"}, 500]},
+                {"$concat": [{"$substrCP": ["$extracted_text", 0, 500]}, "..."]},
+                "$extracted_text"
+            ]}
+        }}
+    ]
+    return await db.health_reports.aggregate(pipeline).to_list(100)
 
 # Daily Log endpoints
 @api_router.post("/daily-logs", response_model=DailyLog)
 async def create_daily_log(log_input: DailyLogCreate):
     """Create daily food and activity log"""
-    log = DailyLog(**log_input.dict())
-    await db.daily_logs.insert_one(log.dict())
+    log = DailyLog(**log_input.model_dump())
+    await db.daily_logs.insert_one(log.model_dump())
     return log
     return log
 
+@api_router.post("/daily-logs/bulk")
+async def create_daily_logs_bulk(log_inputs: List[DailyLogCreate]):
+    """Create many daily logs in one round-trip (e.g. offline backlog sync)"""
+    if not log_inputs:
+        return {"inserted": 0, "log_ids": []}
+    if len(log_inputs) > MAX_BULK_DAILY_LOGS:
+        raise HTTPException(
+            status_code=413,
+            detail=f"At most {MAX_BULK_DAILY_LOGS} daily logs per bulk request, got {len(log_inputs)}"
+        )
+    
+    logs = [DailyLog(**log_input.model_dump()) for log_input in log_inputs]
+    try:
+        await db.daily_logs.insert_many([log.model_dump() for log in logs], ordered=False)
+    except BulkWriteError as e:
+        write_errors = e.details.get('writeErrors', [])
+        logger.error("Bulk daily log insert partially failed: %s", write_errors)
+        # ordered=False keeps going past failures, so report exactly which logs were stored
+        failed = {err["index"] for err in write_errors}
+        raise HTTPException(
+            status_code=500,
+            detail={
+                "inserted": e.details.get('nInserted', 0),
+                "log_ids": [log.log_id for i, log in enumerate(logs) if i not in failed],
+                "failed_log_ids": [logs[i].log_id for i in sorted(failed)]
+            }
+        )
+    
+    return {"inserted": len(logs), "log_ids": [log.log_id for log in logs]}
+
 @api_router.get("/daily-logs/{user_id}", response_model=List[DailyLog])
 async def get_user_logs(user_id: str, limit: int = 30):
     """Get user's daily logs"""
@@ -414,7 +608,7 @@ async def generate_workout_plan(user_id: str = Form(...), hf_api_key: str = Form
         logs = await db.daily_logs.find({"user_id": user_id}).sort("log_date", -1).to_list(7)
         
         # Generate plan
-        plan_data = generate_adaptive_workout_plan(user_id, logs, hf_api_key)
+        plan_data = await generate_adaptive_workout_plan(user_id, logs, hf_api_key)
         
         # Create workout plan with string date
         plan = WorkoutPlan(
@@ -424,7 +618,7 @@ async def generate_workout_plan(user_id: str = Form(...), hf_api_key: str = Form
             recommendations=plan_data['recommendations']
         )
         
-        await db.workout_plans.insert_one(plan.dict())
+        await db.workout_plans.insert_one(plan.model_dump())
         
         return {
             "plan_id": plan.plan_id,
@@ -433,7 +627,7 @@ async def generate_workout_plan(user_id: str = Form(...), hf_api_key: str = Form
             "message": "Workout plan generated successfully"
         }
     except Exception as e:
-        logger.error(f"Workout plan generation failed: {str(e)}")
+        logger.error("Workout plan generation failed: %s", e)
         raise HTTPException(status_code=500, detail=str(e))
 
 @api_router.get("/workout-plans/{user_id}", response_model=List[WorkoutPlan])
@@ -445,7 +639,7 @@ async def get_user_workout_plans(user_id: str, limit: int = 10):
 @api_router.get("/exercises/search")
 async def search_exercises(query: str = "fitness", limit: int = 20):
     """Search exercises from WGER API"""
-    exercises = get_workout_exercises_from_wger(query, limit)
+    exercises = await get_workout_exercises_from_wger(query, limit)
     return {"exercises": exercises}
 
 # Include the router in the main app
@@ -459,6 +653,22 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+@app.on_event("startup")
+async def create_indexes():
+    # Compound indexes match the per-user "filter + newest first" list queries
+    await db.health_reports.create_index([("user_id", 1), ("upload_date", -1)])
+    await db.daily_logs.create_index([("user_id", 1), ("log_date", -1)])
+    await db.workout_plans.create_index([("user_id", 1), ("plan_date", -1)])
+    await db.users.create_index("user_id", unique=True)
+    await db.hf_cache.create_index("key", unique=True)
+    await db.ocr_cache.create_index("sha256", unique=True)
+    # TTL indexes keep the content-addressed caches from growing without bound
+    await db.hf_cache.create_index("created_at", expireAfterSeconds=CACHE_TTL_SECONDS)
+    await db.ocr_cache.create_index("created_at", expireAfterSeconds=CACHE_TTL_SECONDS)
+
 @app.on_event("shutdown")
 async def shutdown_db_client():
     client.close()
+    await http_client.aclose()
+    _ocr_executor.shutdown(wait=False)
+    _pdf_executor.shutdown(wait=False)
@@ -4,13 +4,18 @@ Backend API Testing Suite for Health Coach AI App
 Tests all backend endpoints with realistic data and comprehensive error handling.
 """
 
-import requests
-import json
+import asyncio
+import httpx
+import orjson
+import time
+from collections import Counter
 import base64
 import logging
-from datetime import datetime, date
-from typing import Dict, Any, List
-import io
+from datetime import datetime, date, timedelta
+from typing import Dict, Any, List, Callable, Optional
+from dataclasses import dataclass
+import tempfile
+from pathlib import Path
 
 # Configure logging
 logging.basicConfig(
@@ -21,7 +26,9 @@ logger = logging.getLogger(__name__)
 
 # Backend configuration
 BASE_URL = "https://health-coach-ai-22.preview.emergentagent.com/api"
-HEADERS = {"Content-Type": "application/json"}
+# Gateway errors that idempotent GETs are retried on, with exponential backoff
+RETRY_STATUSES = {502, 503, 504}
+MAX_GET_RETRIES = 2
 
 # Test data
 TEST_USER_DATA = {
@@ -60,17 +67,15 @@ TEST_DAILY_LOG = {
     "water_intake": "8 glasses (2 liters)"
 }
 
-class BackendTestSuite:
-    def __init__(self):
-        self.test_user_id = None
-        self.test_report_id = None
-        self.test_log_id = None
-        self.test_plan_id = None
-        self.results = {}
-        
-    def create_test_pdf_base64(self) -> str:
-        """Create a simple test text file as PDF substitute for testing"""
-        test_content = """
+# Minimal one-page PDF used for the upload test (base64)
+TEST_PDF_BASE64 = """JVBERi0xLjQKMSAwIG9iago8PAovVHlwZSAvQ2F0YWxvZwovUGFnZXMgMiAwIFIKPj4KZW5kb2JqCjIgMCBvYmoKPDwKL1R5cGUgL1BhZ2VzCi9LaWRzIFszIDAgUl0KL0NvdW50IDEKPD4KZW5kb2JqCjMgMCBvYmoKPDwKL1R5cGUgL1BhZ2UKL1BhcmVudCAyIDAgUgovTWVkaWFCb3ggWzAgMCA2MTIgNzkyXQovUmVzb3VyY2VzIDQgMCBSCi9Db250ZW50cyA1IDAgUgo+PgplbmRvYmoKNCAwIG9iago8PAovRm9udCA2IDAgUgo+PgplbmRvYmoKNSAwIG9iago8PAovTGVuZ3RoIDQ0Cj4+CnN0cmVhbQpCVAovRjEgMTIgVGYKNzIgNzIwIFRkCihIZWFsdGggUmVwb3J0IFRlc3QpIFRqCkVUCmVuZHN0cmVhbQplbmRvYmoKNiAwIG9iago8PAovRjEgPDwKL1R5cGUgL0ZvbnQKL1N1YnR5cGUgL1R5cGUxCi9CYXNlRm9udCAvSGVsdmV0aWNhCj4+Cj4+CmVuZG9iagp4cmVmCjAgNwowMDAwMDAwMDAwIDY1NTM1IGYgCjAwMDAwMDAwMTAgMDAwMDAgbiAKMDAwMDAwMDA1MyAwMDAwMCBuIAowMDAwMDAwMTI1IDAwMDAwIG4gCjAwMDAwMDAyMzAgMDAwMDAgbiAKMDAwMDAwMDI2MyAwMDAwMCBuIAowMDAwMDAwMzU0IDAwMDAwIG4gCnRyYWlsZXIKPDwKL1NpemUgNwovUm9vdCAxIDAgUgo+PgpzdGFydHhyZWYKNDUzCiUlRU9G"""
+TEST_PDF_BYTES = base64.b64decode(TEST_PDF_BASE64)
+# Written to disk once so uploads can stream it from a file handle
+TEST_PDF_PATH = Path(tempfile.gettempdir()) / "hc_ai_test.pdf"
+TEST_PDF_PATH.write_bytes(TEST_PDF_BYTES)
+
+# Plain-text lab report used as a PDF substitute
+TEST_REPORT_TEXT = """
         HEALTH REPORT - LAB RESULTS
         
         Patient: Sarah Johnson
@@ -88,44 +93,214 @@ class BackendTestSuite:
         NOTES: Overall good health markers. Vitamin D slightly low.
         Recommend increased sun exposure and dietary sources.
         """
-        return base64.b64encode(test_content.encode()).decode()
+TEST_REPORT_BASE64 = base64.b64encode(TEST_REPORT_TEXT.encode()).decode()
+
+@dataclass(slots=True)
+class ApiTestCase:
+    """Declarative description of one endpoint test"""
+    name: str
+    method: str
+    endpoint: str  # formatted with the suite's attributes, e.g. "/users/{test_user_id}"
+    stage: int  # tests in the same stage run concurrently, stages run in order
+    success_message: Callable[[Any], str]  # built from the response data
+    payload: Optional[Callable[["BackendTestSuite"], Any]] = None  # dict, or list for bulk endpoints
+    params: Optional[Dict] = None
+    form: bool = False  # send payload as form fields instead of JSON
+    upload_pdf: bool = False  # attach the PDF fixture as the "file" field
+    depends_on: tuple[str, ...] = ()  # tests (in earlier stages) that must pass first
+    capture: Optional[tuple[str, str]] = None  # (response key, suite attribute) to store from the response
+    validate: Optional[Callable[[Any], bool]] = None  # extra check on the response data
+    invalid_error: str = "Invalid response format returned"
+    expected_error_status: Optional[int] = None  # error status that counts as a pass
+    expected_error_message: str = ""
+
+def _is_list(data: Any) -> bool:
+    return isinstance(data, list)
+
+TESTS = (
+    ApiTestCase(
+        name="User Registration API",
+        method="POST",
+        endpoint="/users",
+        stage=0,
+        payload=lambda suite: TEST_USER_DATA,
+        capture=("user_id", "test_user_id"),
+        validate=lambda data: "user_id" in data,
+        invalid_error="No user_id returned in response",
+        success_message=lambda data: f"✅ User created successfully with ID: {data['user_id']}",
+    ),
+    ApiTestCase(
+        name="Get User API",
+        method="GET",
+        endpoint="/users/{test_user_id}",
+        stage=1,
+        depends_on=("User Registration API",),
+        validate=lambda data: data.get("email") == TEST_USER_DATA["email"],
+        invalid_error="Retrieved user data doesn't match",
+        success_message=lambda data: "✅ User data retrieved successfully",
+    ),
+    ApiTestCase(
+        name="PDF Upload with OCR",
+        method="POST",
+        endpoint="/health-reports/upload",
+        stage=1,
+        depends_on=("User Registration API",),
+        payload=lambda suite: {"user_id": suite.test_user_id},
+        upload_pdf=True,
+        capture=("report_id", "test_report_id"),
+        validate=lambda data: "report_id" in data,
+        invalid_error="No report_id returned",
+        success_message=lambda data: f"✅ PDF uploaded and OCR processed successfully. Report ID: {data['report_id']}",
+    ),
+    ApiTestCase(
+        name="Daily Log Submission",
+        method="POST",
+        endpoint="/daily-logs",
+        stage=1,
+        depends_on=("User Registration API",),
+        payload=lambda suite: {"user_id": suite.test_user_id, "log_date": date.today().isoformat(), **TEST_DAILY_LOG},
+        capture=("log_id", "test_log_id"),
+        validate=lambda data: "log_id" in data,
+        invalid_error="No log_id returned",
+        success_message=lambda data: f"✅ Daily log submitted successfully. Log ID: {data['log_id']}",
+    ),
+    ApiTestCase(
+        name="Bulk Daily Log Submission",
+        method="POST",
+        endpoint="/daily-logs/bulk",
+        stage=1,
+        depends_on=("User Registration API",),
+        payload=lambda suite: [
+            {"user_id": suite.test_user_id, "log_date": (date.today() - timedelta(days=days_ago)).isoformat(), **TEST_DAILY_LOG}
+            for days_ago in (1, 2)
+        ],
+        validate=lambda data: data.get("inserted") == 2 and len(data.get("log_ids", [])) == 2,
+        invalid_error="Bulk insert did not report 2 stored logs",
+        success_message=lambda data: f"✅ Bulk submitted {data['inserted']} daily logs",
+    ),
+    ApiTestCase(
+        name="WGER Exercises Search",
+        method="GET",
+        endpoint="/exercises/search",
+        stage=1,
+        params={"query": "fitness", "limit": 10},
+        validate=lambda data: isinstance(data.get("exercises"), list),
+        invalid_error="Invalid exercises format returned",
+        success_message=lambda data: f"✅ Retrieved {len(data['exercises'])} exercises from WGER API",
+    ),
+    ApiTestCase(
+        name="Workout Plan Generation",
+        method="POST",
+        endpoint="/workout-plans/generate",
+        stage=1,
+        depends_on=("User Registration API",),
+        payload=lambda suite: {"user_id": suite.test_user_id, "hf_api_key": "invalid_key"},
+        form=True,
+        capture=("plan_id", "test_plan_id"),
+        expected_error_status=500,
+        expected_error_message="✅ Workout plan properly rejects invalid API key (expected behavior)",
+        success_message=lambda data: (
+            f"✅ Workout plan generated (fallback mode). Plan ID: {data['plan_id']}"
+            if "plan_id" in data else "✅ Workout plan endpoint responded (may use fallback)"
+        ),
+    ),
+    ApiTestCase(
+        name="Get User Reports",
+        method="GET",
+        endpoint="/health-reports/{test_user_id}",
+        stage=2,
+        depends_on=("User Registration API",),
+        validate=_is_list,
+        invalid_error="Invalid reports format returned",
+        success_message=lambda data: f"✅ Retrieved {len(data)} reports for user",
+    ),
+    ApiTestCase(
+        name="AI Analysis",
+        method="POST",
+        endpoint="/health-reports/analyze",
+        stage=2,
+        depends_on=("PDF Upload with OCR",),
+        payload=lambda suite: {"report_id": suite.test_report_id, "hf_api_key": "invalid_key"},
+        expected_error_status=500,
+        expected_error_message="✅ AI Analysis properly rejects invalid API key (expected behavior)",
+        success_message=lambda data: "✅ AI Analysis worked (valid API key provided)",
+    ),
+    ApiTestCase(
+        name="Get User Logs",
+        method="GET",
+        endpoint="/daily-logs/{test_user_id}",
+        stage=2,
+        depends_on=("Daily Log Submission", "Bulk Daily Log Submission"),
+        validate=lambda data: _is_list(data) and len(data) >= 3,  # 1 single + 2 bulk logs
+        invalid_error="Invalid logs format returned",
+        success_message=lambda data: f"✅ Retrieved {len(data)} daily logs for user",
+    ),
+    ApiTestCase(
+        name="Get User Workout Plans",
+        method="GET",
+        endpoint="/workout-plans/{test_user_id}",
+        stage=2,
+        depends_on=("User Registration API",),
+        validate=_is_list,
+        invalid_error="Invalid plans format returned",
+        success_message=lambda data: f"✅ Retrieved {len(data)} workout plans for user",
+    ),
+)
 
-    def test_api_endpoint(self, method: str, endpoint: str, data: Dict = None, 
-                         files: Dict = None, params: Dict = None) -> Dict[str, Any]:
-        """Generic API test method with error handling"""
-        url = f"{BASE_URL}{endpoint}"
+class BackendTestSuite:
+    def __init__(self):
+        self.test_user_id = None
+        self.test_report_id = None
+        self.test_log_id = None
+        self.test_plan_id = None
+        self.results = {}
+        # Shared HTTP/2 client, opened for the duration of run_all_tests
+        self.client = None
         
+    def create_test_pdf_base64(self) -> str:
+        """Create a simple test text file as PDF substitute for testing"""
+        return TEST_REPORT_BASE64
+
+    async def test_api_endpoint(self, method: str, endpoint: str, data: Any = None, 
+                         files: Dict = None, params: Dict = None, form: bool = False) -> Dict[str, Any]:
+        """Generic API test method with error handling (endpoint is relative to BASE_URL)"""
         try:
+            start = time.perf_counter()
             if method.upper() == "GET":
-                response = requests.get(url, headers=HEADERS, params=params, timeout=30)
+                for attempt in range(MAX_GET_RETRIES + 1):
+                    response = await self.client.get(endpoint, params=params, timeout=30)
+                    if response.status_code not in RETRY_STATUSES or attempt == MAX_GET_RETRIES:
+                        break
+                    await asyncio.sleep(0.2 * 2 ** attempt)
             elif method.upper() == "POST":
-                if files:
-                    response = requests.post(url, data=data, files=files, timeout=60)
+                if files or form:
+                    response = await self.client.post(endpoint, data=data, files=files, timeout=60)
                 else:
-                    response = requests.post(url, headers=HEADERS, json=data, timeout=60)
+                    response = await self.client.post(endpoint, json=data, timeout=60)
             else:
                 raise ValueError(f"Unsupported method: {method}")
+            response_time = time.perf_counter() - start
                 
             result = {
                 "success": response.status_code in [200, 201],
                 "status_code": response.status_code,
-                "response_time": response.elapsed.total_seconds()
+                "response_time": response_time
             }
             
-            try:
-                result["data"] = response.json()
-            except json.JSONDecodeError:
+            if response.headers.get("content-type", "").startswith("application/json"):
+                result["data"] = orjson.loads(response.content)
+            else:
                 result["data"] = {"text": response.text}
                 
             return result
             
-        except requests.exceptions.Timeout:
+        except httpx.TimeoutException:
             return {
                 "success": False,
                 "error": "Request timeout (>30s)",
                 "status_code": None
             }
-        except requests.exceptions.ConnectionError:
+        except httpx.ConnectError:
             return {
                 "success": False, 
                 "error": "Connection error - backend may be down",
@@ -138,359 +313,131 @@ class BackendTestSuite:
                 "status_code": None
             }
 
-    def test_1_user_registration(self) -> Dict[str, Any]:
-        """Test 1: User Registration API"""
-        logger.info("Testing User Registration API...")
-        
-        result = self.test_api_endpoint("POST", "/users", TEST_USER_DATA)
-        
-        if result["success"]:
-            user_data = result["data"]
-            if "user_id" in user_data:
-                self.test_user_id = user_data["user_id"]
-                result["message"] = f"✅ User created successfully with ID: {self.test_user_id}"
-            else:
-                result["success"] = False
-                result["error"] = "No user_id returned in response"
-        else:
-            result["message"] = f"❌ Registration failed: {result.get('error', 'Unknown error')}"
-            
-        return result
-
-    def test_2_get_user(self) -> Dict[str, Any]:
-        """Test 2: Get User API"""
-        logger.info("Testing Get User API...")
-        
-        if not self.test_user_id:
-            return {
-                "success": False,
-                "error": "No test user ID available (registration may have failed)"
-            }
-            
-        result = self.test_api_endpoint("GET", f"/users/{self.test_user_id}")
-        
-        if result["success"]:
-            user_data = result["data"]
-            if user_data.get("email") == TEST_USER_DATA["email"]:
-                result["message"] = "✅ User data retrieved successfully"
-            else:
-                result["success"] = False
-                result["error"] = "Retrieved user data doesn't match"
+    async def run_test_case(self, test_case: ApiTestCase) -> Dict[str, Any]:
+        """Execute one declarative endpoint test"""
+        logger.info("Testing %s...", test_case.name)
+        
+        data = test_case.payload(self) if test_case.payload else None
+        endpoint = test_case.endpoint.format(**vars(self))
+        
+        if test_case.upload_pdf:
+            # Stream the fixture from disk instead of holding a copy in memory per upload
+            with open(TEST_PDF_PATH, "rb") as pdf_file:
+                files = {
+                    'file': ('test_health_report.pdf', pdf_file, 'application/pdf')
+                }
+                result = await self.test_api_endpoint(test_case.method, endpoint, data=data, files=files)
         else:
-            result["message"] = f"❌ Get user failed: {result.get('error', 'Unknown error')}"
-            
-        return result
-
-    def test_3_pdf_upload_ocr(self) -> Dict[str, Any]:
-        """Test 3: PDF Upload with OCR"""
-        logger.info("Testing PDF Upload with OCR...")
-        
-        if not self.test_user_id:
-            return {
-                "success": False,
-                "error": "No test user ID available"
-            }
-        
-        # Create a simple test PDF content (base64)
-        test_pdf_content = """JVBERi0xLjQKMSAwIG9iago8PAovVHlwZSAvQ2F0YWxvZwovUGFnZXMgMiAwIFIKPj4KZW5kb2JqCjIgMCBvYmoKPDwKL1R5cGUgL1BhZ2VzCi9LaWRzIFszIDAgUl0KL0NvdW50IDEKPD4KZW5kb2JqCjMgMCBvYmoKPDwKL1R5cGUgL1BhZ2UKL1BhcmVudCAyIDAgUgovTWVkaWFCb3ggWzAgMCA2MTIgNzkyXQovUmVzb3VyY2VzIDQgMCBSCi9Db250ZW50cyA1IDAgUgo+PgplbmRvYmoKNCAwIG9iago8PAovRm9udCA2IDAgUgo+PgplbmRvYmoKNSAwIG9iago8PAovTGVuZ3RoIDQ0Cj4+CnN0cmVhbQpCVAovRjEgMTIgVGYKNzIgNzIwIFRkCihIZWFsdGggUmVwb3J0IFRlc3QpIFRqCkVUCmVuZHN0cmVhbQplbmRvYmoKNiAwIG9iago8PAovRjEgPDwKL1R5cGUgL0ZvbnQKL1N1YnR5cGUgL1R5cGUxCi9CYXNlRm9udCAvSGVsdmV0aWNhCj4+Cj4+CmVuZG9iagp4cmVmCjAgNwowMDAwMDAwMDAwIDY1NTM1IGYgCjAwMDAwMDAwMTAgMDAwMDAgbiAKMDAwMDAwMDA1MyAwMDAwMCBuIAowMDAwMDAwMTI1IDAwMDAwIG4gCjAwMDAwMDAyMzAgMDAwMDAgbiAKMDAwMDAwMDI2MyAwMDAwMCBuIAowMDAwMDAwMzU0IDAwMDAwIG4gCnRyYWlsZXIKPDwKL1NpemUgNwovUm9vdCAxIDAgUgo+PgpzdGFydHhyZWYKNDUzCiUlRU9G"""
-        
-        # Create a proper file object
-        import io
-        import base64
-        test_file_bytes = base64.b64decode(test_pdf_content)
-        
-        files = {
-            'file': ('test_health_report.pdf', io.BytesIO(test_file_bytes), 'application/pdf')
-        }
-        data = {'user_id': self.test_user_id}
-        
-        result = self.test_api_endpoint("POST", "/health-reports/upload", data=data, files=files)
+            result = await self.test_api_endpoint(
+                test_case.method, endpoint, data=data, params=test_case.params, form=test_case.form
+            )
         
         if result["success"]:
-            report_data = result["data"]
-            if "report_id" in report_data:
-                self.test_report_id = report_data["report_id"]
-                result["message"] = f"✅ PDF uploaded and OCR processed successfully. Report ID: {self.test_report_id}"
-            else:
+            response_data = result["data"]
+            if test_case.validate and not test_case.validate(response_data):
                 result["success"] = False
-                result["error"] = "No report_id returned"
-        else:
-            result["message"] = f"❌ PDF upload failed: {result.get('error', 'Unknown error')}"
-            
-        return result
-
-    def test_4_get_user_reports(self) -> Dict[str, Any]:
-        """Test 4: Get User Reports"""
-        logger.info("Testing Get User Reports...")
-        
-        if not self.test_user_id:
-            return {
-                "success": False,
-                "error": "No test user ID available"
-            }
-            
-        result = self.test_api_endpoint("GET", f"/health-reports/{self.test_user_id}")
-        
-        if result["success"]:
-            reports = result["data"]
-            if isinstance(reports, list) and len(reports) >= 0:
-                result["message"] = f"✅ Retrieved {len(reports)} reports for user"
+                result["error"] = test_case.invalid_error
             else:
-                result["success"] = False
-                result["error"] = "Invalid reports format returned"
-        else:
-            result["message"] = f"❌ Get reports failed: {result.get('error', 'Unknown error')}"
-            
-        return result
-
-    def test_5_ai_analysis(self) -> Dict[str, Any]:
-        """Test 5: AI Health Report Analysis"""
-        logger.info("Testing AI Analysis (without API key)...")
-        
-        if not self.test_report_id:
-            return {
-                "success": False,
-                "error": "No test report ID available (upload may have failed)"
-            }
-        
-        # Test without HF API key - should return proper error
-        analysis_data = {
-            "report_id": self.test_report_id,
-            "hf_api_key": "invalid_key"
-        }
-        
-        result = self.test_api_endpoint("POST", "/health-reports/analyze", analysis_data)
-        
-        # For AI analysis, we expect it to fail without valid API key
-        if not result["success"] and result["status_code"] == 500:
-            result["message"] = "✅ AI Analysis properly rejects invalid API key (expected behavior)"
+                if test_case.capture:
+                    key, attr = test_case.capture
+                    if key in response_data:
+                        setattr(self, attr, response_data[key])
+                result["message"] = test_case.success_message(response_data)
+        elif test_case.expected_error_status and result["status_code"] == test_case.expected_error_status:
+            result["message"] = test_case.expected_error_message
             result["success"] = True  # This is expected behavior
-        elif result["success"]:
-            result["message"] = "✅ AI Analysis worked (valid API key provided)"
-        else:
-            result["message"] = f"❌ AI Analysis failed unexpectedly: {result.get('error', 'Unknown error')}"
-            
-        return result
-
-    def test_6_daily_log_submission(self) -> Dict[str, Any]:
-        """Test 6: Daily Log Submission"""
-        logger.info("Testing Daily Log Submission...")
-        
-        if not self.test_user_id:
-            return {
-                "success": False,
-                "error": "No test user ID available"
-            }
-        
-        log_data = {
-            "user_id": self.test_user_id,
-            "log_date": date.today().isoformat(),
-            **TEST_DAILY_LOG
-        }
-        
-        result = self.test_api_endpoint("POST", "/daily-logs", log_data)
-        
-        if result["success"]:
-            log_response = result["data"]
-            if "log_id" in log_response:
-                self.test_log_id = log_response["log_id"]
-                result["message"] = f"✅ Daily log submitted successfully. Log ID: {self.test_log_id}"
-            else:
-                result["success"] = False
-                result["error"] = "No log_id returned"
-        else:
-            result["message"] = f"❌ Daily log submission failed: {result.get('error', 'Unknown error')}"
-            
-        return result
-
-    def test_7_get_user_logs(self) -> Dict[str, Any]:
-        """Test 7: Get User Daily Logs"""
-        logger.info("Testing Get User Daily Logs...")
-        
-        if not self.test_user_id:
-            return {
-                "success": False,
-                "error": "No test user ID available"
-            }
-            
-        result = self.test_api_endpoint("GET", f"/daily-logs/{self.test_user_id}")
-        
-        if result["success"]:
-            logs = result["data"]
-            if isinstance(logs, list) and len(logs) >= 0:
-                result["message"] = f"✅ Retrieved {len(logs)} daily logs for user"
-            else:
-                result["success"] = False
-                result["error"] = "Invalid logs format returned"
         else:
-            result["message"] = f"❌ Get logs failed: {result.get('error', 'Unknown error')}"
+            result["message"] = f"❌ {test_case.name} failed: {result.get('error', 'Unknown error')}"
             
         return result
 
-    def test_8_wger_exercises_search(self) -> Dict[str, Any]:
-        """Test 8: WGER Exercises Search"""
-        logger.info("Testing WGER Exercises Search...")
-        
-        params = {"query": "fitness", "limit": 10}
-        result = self.test_api_endpoint("GET", "/exercises/search", params=params)
-        
-        if result["success"]:
-            exercises_data = result["data"]
-            if "exercises" in exercises_data and isinstance(exercises_data["exercises"], list):
-                exercise_count = len(exercises_data["exercises"])
-                result["message"] = f"✅ Retrieved {exercise_count} exercises from WGER API"
-            else:
-                result["success"] = False
-                result["error"] = "Invalid exercises format returned"
-        else:
-            result["message"] = f"❌ WGER search failed: {result.get('error', 'Unknown error')}"
-            
-        return result
-
-    def test_9_workout_plan_generation(self) -> Dict[str, Any]:
-        """Test 9: Workout Plan Generation"""
-        logger.info("Testing Workout Plan Generation (without API key)...")
-        
-        if not self.test_user_id:
-            return {
+    async def _run_test(self, test_case: ApiTestCase) -> Dict[str, Any]:
+        """Run a single test, record its result and report it"""
+        # Don't spend a request on a test whose prerequisite already failed
+        failed_deps = [dep for dep in test_case.depends_on if not self.results[dep]["success"]]
+        if failed_deps:
+            result = {
                 "success": False,
-                "error": "No test user ID available"
+                "skipped": True,
+                "error": f"Prerequisite failed: {', '.join(failed_deps)}"
             }
+            self.results[test_case.name] = result
+            print(f"Skipped: {test_case.name}\n  ⏭️  {result['error']}\n")
+            return result
         
-        # Test with form data as expected by the endpoint
-        data = {
-            "user_id": self.test_user_id,
-            "hf_api_key": "invalid_key"
-        }
-        
-        # Use form data instead of JSON
         try:
-            url = f"{BASE_URL}/workout-plans/generate"
-            response = requests.post(url, data=data, timeout=60)
-            
-            result = {
-                "success": response.status_code in [200, 201],
-                "status_code": response.status_code,
-                "response_time": response.elapsed.total_seconds()
-            }
-            
-            try:
-                result["data"] = response.json()
-            except:
-                result["data"] = {"text": response.text}
-                
+            result = await self.run_test_case(test_case)
+            if result["success"]:
+                output = f"  {result.get('message', '✅ Passed')}"
+            else:
+                output = f"  ❌ Failed: {result.get('error', 'Unknown error')}"
         except Exception as e:
             result = {
                 "success": False,
-                "error": f"Request error: {str(e)}",
-                "status_code": None
-            }
-        
-        if result["success"]:
-            plan_data = result["data"]
-            if "plan_id" in plan_data:
-                self.test_plan_id = plan_data["plan_id"]
-                result["message"] = f"✅ Workout plan generated (fallback mode). Plan ID: {self.test_plan_id}"
-            else:
-                result["message"] = "✅ Workout plan endpoint responded (may use fallback)"
-        elif result["status_code"] == 500:
-            result["message"] = "✅ Workout plan properly rejects invalid API key (expected behavior)"
-            result["success"] = True  # This is expected behavior
-        else:
-            result["message"] = f"❌ Workout plan generation failed: {result.get('error', 'Unknown error')}"
-            
-        return result
-
-    def test_10_get_user_workout_plans(self) -> Dict[str, Any]:
-        """Test 10: Get User Workout Plans"""
-        logger.info("Testing Get User Workout Plans...")
-        
-        if not self.test_user_id:
-            return {
-                "success": False,
-                "error": "No test user ID available"
+                "error": f"Test execution error: {str(e)}"
             }
-            
-        result = self.test_api_endpoint("GET", f"/workout-plans/{self.test_user_id}")
+            output = f"  ❌ Test error: {str(e)}"
         
-        if result["success"]:
-            plans = result["data"]
-            if isinstance(plans, list) and len(plans) >= 0:
-                result["message"] = f"✅ Retrieved {len(plans)} workout plans for user"
-            else:
-                result["success"] = False
-                result["error"] = "Invalid plans format returned"
-        else:
-            result["message"] = f"❌ Get workout plans failed: {result.get('error', 'Unknown error')}"
-            
+        self.results[test_case.name] = result
+        print(f"Finished: {test_case.name}\n{output}\n")
         return result
 
-    def run_all_tests(self) -> Dict[str, Any]:
-        """Run all backend API tests in sequence"""
+    async def run_all_tests(self) -> Dict[str, Any]:
+        """Run all backend API tests, stage by stage"""
         print(f"\n🚀 Starting Health Coach AI Backend API Tests")
         print(f"Backend URL: {BASE_URL}")
         print(f"Test started at: {datetime.now()}\n")
         
-        tests = [
-            ("User Registration API", self.test_1_user_registration),
-            ("Get User API", self.test_2_get_user),
-            ("PDF Upload with OCR", self.test_3_pdf_upload_ocr),
-            ("Get User Reports", self.test_4_get_user_reports),
-            ("AI Analysis", self.test_5_ai_analysis),
-            ("Daily Log Submission", self.test_6_daily_log_submission),
-            ("Get User Logs", self.test_7_get_user_logs),
-            ("WGER Exercises Search", self.test_8_wger_exercises_search),
-            ("Workout Plan Generation", self.test_9_workout_plan_generation),
-            ("Get User Workout Plans", self.test_10_get_user_workout_plans)
+        # Each stage only depends on state created by earlier stages, so the
+        # tests within a stage are independent and run concurrently
+        stages = [
+            [test_case for test_case in TESTS if test_case.stage == stage]
+            for stage in sorted({test_case.stage for test_case in TESTS})
         ]
         
-        results = {}
-        passed = 0
-        total = len(tests)
-        
-        for test_name, test_func in tests:
-            print(f"Running: {test_name}...")
-            try:
-                result = test_func()
-                results[test_name] = result
-                
-                if result["success"]:
-                    passed += 1
-                    print(f"  {result.get('message', '✅ Passed')}")
-                else:
-                    print(f"  ❌ Failed: {result.get('error', 'Unknown error')}")
-                    
-            except Exception as e:
-                results[test_name] = {
-                    "success": False,
-                    "error": f"Test execution error: {str(e)}"
-                }
-                print(f"  ❌ Test error: {str(e)}")
-            
-            print()  # Add spacing between tests
+        # Concurrent requests are multiplexed over a single HTTP/2 connection
+        transport = httpx.AsyncHTTPTransport(
+            http2=True,
+            retries=2,
+            limits=httpx.Limits(max_keepalive_connections=8, max_connections=16)
+        )
+        async with httpx.AsyncClient(base_url=BASE_URL, timeout=httpx.Timeout(60.0), transport=transport) as client:
+            self.client = client
+            for stage in stages:
+                print(f"Running: {', '.join(test_case.name for test_case in stage)}...\n")
+                await asyncio.gather(*(self._run_test(test_case) for test_case in stage))
+        
+        results = self.results
+        # Skipped tests never ran, so they count toward neither failures nor the success rate
+        counts = Counter(
+            "skipped" if result.get("skipped") else result.get("success", False)
+            for result in results.values()
+        )
+        passed, failed, skipped = counts[True], counts[False], counts["skipped"]
+        total = passed + failed + skipped
+        success_rate = (passed / (passed + failed)) * 100 if passed + failed else 0.0
         
         # Summary
         print(f"\n📊 TEST SUMMARY")
         print(f"{'='*50}")
         print(f"Total Tests: {total}")
         print(f"Passed: {passed}")
-        print(f"Failed: {total - passed}")
-        print(f"Success Rate: {(passed/total)*100:.1f}%")
+        print(f"Failed: {failed}")
+        print(f"Skipped: {skipped}")
+        print(f"Success Rate: {success_rate:.1f}%")
+        print("\n🎉 All tests passed! Backend is working correctly." if not failed
+              else f"\n⚠️  {failed} tests failed ({skipped} skipped because of them). Check the details above.")
         
-        if passed == total:
-            print(f"\n🎉 All tests passed! Backend is working correctly.")
-        else:
-            print(f"\n⚠️  {total - passed} tests failed. Check the details above.")
-            
         return {
             "total_tests": total,
             "passed": passed,
-            "failed": total - passed,
-            "success_rate": (passed/total)*100,
+            "failed": failed,
+            "skipped": skipped,
+            "success_rate": success_rate,
             "results": results
         }
 
 if __name__ == "__main__":
     # Run the test suite
     test_suite = BackendTestSuite()
-    results = test_suite.run_all_tests()
\ No newline at end of file
+    results = asyncio.run(test_suite.run_all_tests())
\ No newline at end of file
@@ -2,33 +2,45 @@
 """
 Focused test for the specific issues mentioned in the review request
 """
+import functools
 import requests
 import json
 from datetime import date
 
 BASE_URL = "https://health-coach-ai-22.preview.emergentagent.com/api"
 
+# Shared keep-alive session so all requests reuse one connection
+SESSION = requests.Session()
+
+TEST_USER_DATA = {
+    "name": "Test User",
+    "email": "test@example.com", 
+    "age": 30,
+    "gender": "male",
+    "height": 175.0,
+    "weight": 70.0
+}
+
+@functools.lru_cache(maxsize=1)
+def _shared_user_id() -> str:
+    """Create the test user once and reuse its id across tests"""
+    user_resp = SESSION.post(f"{BASE_URL}/users", json=TEST_USER_DATA)
+    if user_resp.status_code != 200:
+        raise RuntimeError(user_resp.text)
+    
+    user_id = user_resp.json()["user_id"]
+    print(f"✅ Created test user: {user_id}")
+    return user_id
+
 def test_daily_log_bson():
     """Test daily log with string dates (BSON fix)"""
     print("Testing Daily Log BSON fix...")
     
-    # Create a test user first
-    user_data = {
-        "name": "Test User",
-        "email": "test@example.com", 
-        "age": 30,
-        "gender": "male",
-        "height": 175.0,
-        "weight": 70.0
-    }
-    
-    user_resp = requests.post(f"{BASE_URL}/users", json=user_data)
-    if user_resp.status_code != 200:
-        print(f"❌ Failed to create user: {user_resp.text}")
+    try:
+        user_id = _shared_user_id()
+    except RuntimeError as e:
+        print(f"❌ Failed to create user: {e}")
         return False
-        
-    user_id = user_resp.json()["user_id"]
-    print(f"✅ Created test user: {user_id}")
     
     # Test daily log with string date
     log_data = {
@@ -41,7 +53,7 @@ def test_daily_log_bson():
         "water_intake": "8 glasses"
     }
     
-    log_resp = requests.post(f"{BASE_URL}/daily-logs", json=log_data)
+    log_resp = SESSION.post(f"{BASE_URL}/daily-logs", json=log_data)
     print(f"Daily log response status: {log_resp.status_code}")
     
     if log_resp.status_code == 200:
@@ -57,23 +69,11 @@ def test_workout_plan_bson():
     """Test workout plan generation with string dates (BSON fix)"""
     print("\nTesting Workout Plan BSON fix...")
     
-    # Create a test user first
-    user_data = {
-        "name": "Workout User",
-        "email": "workout@example.com", 
-        "age": 28,
-        "gender": "female",
-        "height": 160.0,
-        "weight": 60.0
-    }
-    
-    user_resp = requests.post(f"{BASE_URL}/users", json=user_data)
-    if user_resp.status_code != 200:
-        print(f"❌ Failed to create user: {user_resp.text}")
+    try:
+        user_id = _shared_user_id()
+    except RuntimeError as e:
+        print(f"❌ Failed to create user: {e}")
         return False
-        
-    user_id = user_resp.json()["user_id"]
-    print(f"✅ Created test user: {user_id}")
     
     # Test workout plan generation (should use fallback without valid API key)
     plan_data = {
@@ -81,7 +81,7 @@ def test_workout_plan_bson():
         "hf_api_key": "test_key"
     }
     
-    plan_resp = requests.post(f"{BASE_URL}/workout-plans/generate", data=plan_data)
+    plan_resp = SESSION.post(f"{BASE_URL}/workout-plans/generate", data=plan_data)
     print(f"Workout plan response status: {plan_resp.status_code}")
     
     if plan_resp.status_code == 200:
@@ -96,18 +96,11 @@ def test_ai_endpoints_error_handling():
     """Test AI endpoints properly handle invalid API keys"""
     print("\nTesting AI Error Handling...")
     
-    # Create a test user and report
-    user_data = {
-        "name": "AI Test User",
-        "email": "ai@example.com", 
-        "age": 25,
-        "gender": "female",
-        "height": 165.0,
-        "weight": 55.0
-    }
-    
-    user_resp = requests.post(f"{BASE_URL}/users", json=user_data)
-    user_id = user_resp.json()["user_id"]
+    try:
+        user_id = _shared_user_id()
+    except RuntimeError as e:
+        print(f"❌ Failed to create user: {e}")
+        return False
     
     # Upload a simple test file for analysis
     import io
@@ -115,7 +108,7 @@ def test_ai_endpoints_error_handling():
     files = {'file': ('test.pdf', io.BytesIO(test_content), 'application/pdf')}
     upload_data = {'user_id': user_id}
     
-    upload_resp = requests.post(f"{BASE_URL}/health-reports/upload", data=upload_data, files=files)
+    upload_resp = SESSION.post(f"{BASE_URL}/health-reports/upload", data=upload_data, files=files)
     
     if upload_resp.status_code == 200:
         report_id = upload_resp.json()["report_id"]
@@ -126,7 +119,7 @@ def test_ai_endpoints_error_handling():
             "hf_api_key": "invalid_key"
         }
         
-        analysis_resp = requests.post(f"{BASE_URL}/health-reports/analyze", json=analysis_data)
+        analysis_resp = SESSION.post(f"{BASE_URL}/health-reports/analyze", json=analysis_data)
         
         if analysis_resp.status_code == 500:
             print("✅ AI Analysis properly rejects invalid API key (expected 500 error)")